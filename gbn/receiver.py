@@ -18,6 +18,8 @@ class GBNReceiver(Device, OutMixIn):
         
         self.seqno_width = seqno_width
         self.seqno_range = 2**self.seqno_width
+        # seqno_range is a power of two, so `x & seqno_mask` == `x % seqno_range`
+        self.seqno_mask = self.seqno_range - 1
         self.window_size = window_size
         assert self.window_size <= self.seqno_range - 1
         self.seqno_start = 0
@@ -31,7 +33,7 @@ class GBNReceiver(Device, OutMixIn):
         seqno = packet.packet_id
         data = packet.payload
         if seqno != self.seqno_start:
-            recent_orderno = (self.seqno_start + self.seqno_range - 1) % self.seqno_range
+            recent_orderno = (self.seqno_start - 1) & self.seqno_mask
             ack_pkt = self.new_packet(recent_orderno)
             assert self.out
             self.out.put(ack_pkt)
@@ -41,7 +43,7 @@ class GBNReceiver(Device, OutMixIn):
             return
         self.message += data
         ack_pkt = self.new_packet(self.seqno_start)
-        self.seqno_start = (self.seqno_start + 1) % self.seqno_range
+        self.seqno_start = (self.seqno_start + 1) & self.seqno_mask
         assert self.out
         self.out.put(ack_pkt)
         self.dprint(
@@ -21,11 +21,14 @@ class GBNSender(SingleDevice):
         self.seqno_width = seqno_width
         # number range and window size of GBN
         self.seqno_range = 2**self.seqno_width
+        # seqno_range is a power of two, so `x & seqno_mask` == `x % seqno_range`
+        self.seqno_mask = self.seqno_range - 1
         self.window_size = window_size
         assert self.window_size <= self.seqno_range - 1
         self.timeout = timeout
         self.debug = debug
         self.message = message
+        self.msglen = len(message)
         # the sequence number of the next character to be sent
         self.seqno = 0
         # the absolute index of the next character to be sent
@@ -49,10 +52,12 @@ class GBNSender(SingleDevice):
         return Packet(time=self.env.now, size=40, packet_id=seqno, payload=data)
 
     def send_available(self):
-        while len(self.outbound) < self.window_size and self.absno < len(self.message):
-            packet = self.new_packet(self.seqno, self.message[self.absno])
+        msg = self.message
+        msglen = self.msglen
+        while len(self.outbound) < self.window_size and self.absno < msglen:
+            packet = self.new_packet(self.seqno, msg[self.absno])
             self.send_packet(packet)
-            self.seqno = (self.seqno + 1) % self.seqno_range
+            self.seqno = (self.seqno + 1) & self.seqno_mask
             self.absno += 1
             self.outbound.append(packet)
         self.timer.restart(self.timeout)
@@ -74,23 +79,26 @@ class GBNSender(SingleDevice):
     def put(self, packet: Packet):
         """Receiving acknowledgement packet from receiver"""
         ackno = packet.packet_id
-        if self.is_valid_ackno(ackno):
-            num = (ackno + self.seqno_range - self.seqno_start) % self.seqno_range + 1
+        dist = self.ackno_offset(ackno)
+        if dist >= 0:
+            num = dist + 1
             for _ in range(num):
                 self.outbound.popleft()
-                self.seqno_start = (self.seqno_start + 1) % self.seqno_range
+            self.seqno_start = (self.seqno_start + num) & self.seqno_mask
         self.send_available()
 
-        if len(self.outbound) == 0 and self.absno == len(self.message):
+        if len(self.outbound) == 0 and self.absno == self.msglen:
             self.finish_channel.put(True)
 
-    def is_valid_ackno(self, ackno):
-        if ackno < 0 and ackno >= self.seqno_range:
-            return False
-        for pkt in self.outbound:
-            if pkt.packet_id == ackno:
-                return True
-        return False
+    def ackno_offset(self, ackno) -> int:
+        """Return the position in outbound of the packet acknowledged by
+        ackno, or -1 if ackno does not acknowledge an outstanding packet."""
+        if ackno < 0 or ackno >= self.seqno_range:
+            return -1
+        # outstanding seqnos are contiguous from seqno_start, so an ackno is
+        # valid iff its distance from seqno_start falls inside the buffer
+        dist = (ackno - self.seqno_start) & self.seqno_mask
+        return dist if dist < len(self.outbound) else -1
 
     def dprint(self, s):
         if self.debug:
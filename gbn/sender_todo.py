@@ -21,11 +21,14 @@ class GBNSender(Device, OutMixIn):
         self.seqno_width = seqno_width
         # number range and window size of GBN
         self.seqno_range = 2**self.seqno_width
+        # seqno_range is a power of two, so `x & seqno_mask` == `x % seqno_range`
+        self.seqno_mask = self.seqno_range - 1
         self.window_size = window_size
         assert self.window_size <= self.seqno_range - 1
         self.timeout = timeout
         self.debug = debug
         self.message = message
+        self.msglen = len(message)
         # the sequence number of the next character to be sent
         self.seqno = 0
         # the absolute index of the next character to be sent
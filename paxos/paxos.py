@@ -1,4 +1,5 @@
-from typing import Dict, List, Tuple, Any, DefaultDict
+import heapq
+from typing import Callable, Dict, List, Tuple, Any, DefaultDict
 from dataclasses import dataclass
 from collections import defaultdict as dd
 from enum import Enum
@@ -14,47 +15,47 @@ class Fate(Enum):
     FORGOTTEN = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class Instance:
     instance: int
 
 
-@dataclass
+@dataclass(slots=True)
 class PrepareRequest(Instance):
     proposal: int
 
 
-@dataclass
+@dataclass(slots=True)
 class PrepareReply(Instance):
     ok: bool
     proposal: int
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AcceptRequest(Instance):
     proposal: int
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AcceptReply(Instance):
     ok: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class DecidedRequest(Instance):
     sender: int
     done_seq: int
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DecidedReply(Instance):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class State:
     # highest prepare request proposal number received by the acceptor for that instance
     np: int
@@ -64,7 +65,7 @@ class State:
     va: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ProposeInfo:
     # used to ignore deprecated reply
     packet_id: int
@@ -101,6 +102,8 @@ class Paxos(SingleDevice):
         self.peers = peers
         self.me = me
         self.id = peers[me]
+        # a reply count strictly greater than this is a majority of peers
+        self.majority = len(peers) // 2
         self.phase_restart_time = phase_restart_time
         self.debug = debug
         self.packet_id = 0
@@ -109,11 +112,26 @@ class Paxos(SingleDevice):
         self.accept_stores: Dict[str, Store] = dict()
 
         self.max_seq_seen = 0
-        self.done_seqs: List[int] = list()
+        self.done_seqs: List[int] = [-1] * len(peers)
+        # min-heap of (done_seq, peer); an entry is stale once done_seqs[peer]
+        # has advanced past it, and is dropped lazily in do_mem_shrink()
+        self.done_heap: List[Tuple[int, int]] = [(-1, i) for i in range(len(peers))]
+        # states and values of instances <= shrunk_seq have been deleted, and
+        # are not created again for those instances
+        self.shrunk_seq = -1
         self.values: Dict[int, str] = dict()
         self.accept_state: Dict[int, State] = dict()
         self.propose_data: Dict[int, ProposeInfo] = dict()
 
+        # payload type -> receive handler, used by put() to dispatch packets
+        self.handlers: Dict[type, Callable[[Packet], None]] = {
+            PrepareRequest: self.recv_prepare,
+            AcceptRequest: self.recv_accept,
+            PrepareReply: self.recv_prepare_reply,
+            AcceptReply: self.recv_accept_reply,
+            DecidedRequest: self.recv_decided_request,
+        }
+
     def run(self, env):
         pass
 
@@ -156,19 +174,28 @@ class Paxos(SingleDevice):
         """The application on this machine is done with all instances <= seq,
         all deprecated states and values should be deleted.
         """
-        mins = min(self.done_seqs)
-        for seq in self.accept_state.keys():
-            if seq <= mins:
+        heap = self.done_heap
+        while heap[0][0] < self.done_seqs[heap[0][1]]:
+            heapq.heappop(heap)
+        mins = heap[0][0]
+        if mins > self.shrunk_seq:
+            for seq in [seq for seq in self.accept_state if seq <= mins]:
                 del self.accept_state[seq]
+            for seq in [seq for seq in self.values if seq <= mins]:
                 del self.values[seq]
+            self.shrunk_seq = mins
         return mins + 1
 
+    def is_forgotten(self, seq: int) -> bool:
+        """Whether the states and values of instance seq have been deleted."""
+        return seq <= self.shrunk_seq
+
     def min(self) -> int:
         """Return one more than the minimum amoung z_i, where z_i is the
         highest number ever passed to done() on peer i. A peer z_i is -1 if it
         has never called done().
         """
-        return self.do_mem_shrink() + 1
+        return self.do_mem_shrink()
 
     def status(self, seq: int) -> Tuple[Fate, str]:
         """the application wants to know whether this peer thinks an instance
@@ -176,10 +203,13 @@ class Paxos(SingleDevice):
         just inspect the local peer state; it should not contact other Paxos
         peers.
         """
-        if seq < self.min():
-            return Fate.FORGOTTEN, ""
+        # values are shrunk as soon as the minimum done_seq advances and are
+        # never stored for forgotten instances, so any seq found in values is
+        # not forgotten and can be answered before paying for min()
         if seq in self.values:
             return (Fate.DECIDED, self.values[seq])
+        if seq < self.min():
+            return Fate.FORGOTTEN, ""
         return Fate.PENDING, ""
 
     def is_decided(self, seq: int) -> bool:
@@ -198,28 +228,29 @@ class Paxos(SingleDevice):
         )
         return pkt
 
-    def broadcast_prepare_request(self, seq: int, n: int):
-        request = PrepareRequest(seq, n)
-        assert self.out
+    def broadcast(self, request: Instance) -> Packet:
+        """Send request to all peers and return the packet, so the caller can
+        also deliver it to this peer. Every broadcast gets a fresh packet:
+        peers match replies against its packet_id while it is in flight.
+        """
         pkt = self.new_packet(request)
+        assert self.out
         self.out.put(pkt)
+        return pkt
+
+    def broadcast_prepare_request(self, seq: int, n: int):
+        pkt = self.broadcast(PrepareRequest(seq, n))
         self.propose_data[seq] = ProposeInfo(pkt.packet_id, Store(self.env))
         self.recv_prepare(pkt)
 
     def broadcast_accept_request(self, seq: int, n: int, v: str):
-        request = AcceptRequest(seq, n, v)
-        assert self.out
         assert seq in self.propose_data
-        pkt = self.new_packet(request)
-        self.out.put(pkt)
+        pkt = self.broadcast(AcceptRequest(seq, n, v))
         self.recv_accept(pkt)
 
     def broadcast_decide_request(self, seq: int, v: str):
         request = DecidedRequest(seq, self.me, self.done_seqs[self.me], v)
-        pkt = self.new_packet(request)
-        assert self.out
-        self.out.put(pkt)
-        self.recv_decided_request(pkt)
+        self.recv_decided_request(self.broadcast(request))
 
     def send_packet_to(self, payload: Any, peer: str):
         if peer == self.id:
@@ -241,6 +272,8 @@ class Paxos(SingleDevice):
         n = request.proposal
         if seq > self.max_seq_seen:
             self.max_seq_seen = request.instance
+        if self.is_forgotten(seq):
+            return
         state = self.accept_state[seq]
         if n > state.np:
             state.np = n
@@ -263,6 +296,8 @@ class Paxos(SingleDevice):
         seq = request.instance
         n = request.proposal
         v = request.value
+        if self.is_forgotten(seq):
+            return
         state = self.accept_state[seq]
         if n >= state.np:
             state.np = n
@@ -282,9 +317,9 @@ class Paxos(SingleDevice):
                 temp.maxna = reply.proposal
                 temp.v1 = reply.value
             temp.prepare_count += 1
-            if temp.prepare_count > len(self.peers) / 2:
+            if temp.prepare_count > self.majority:
                 temp.prepared = True
-        else:
+        elif not self.is_forgotten(seq):
             state = self.accept_state[seq]
             if reply.proposal > state.np:
                 state.np = reply.proposal
@@ -295,14 +330,17 @@ class Paxos(SingleDevice):
         temp = self.propose_data[seq]
         if reply.ok:
             temp.accept_count += 1
-            if temp.accept_count > len(self.peers) / 2:
+            if temp.accept_count > self.majority:
                 temp.accepted = True
 
     def recv_decided_request(self, packet: Packet):
         request: DecidedRequest = packet.payload
-        self.values[request.instance] = request.value
         if self.done_seqs[request.sender] < request.done_seq:
             self.done_seqs[request.sender] = request.done_seq
+            heapq.heappush(self.done_heap, (request.done_seq, request.sender))
+            self.do_mem_shrink()
+        if not self.is_forgotten(request.instance):
+            self.values[request.instance] = request.value
 
     def put(self, packet):
         payload = packet.payload
@@ -317,16 +355,9 @@ class Paxos(SingleDevice):
             self.dprint(f"ignore deprecated {type(payload)} from {packet.src}")
             return
 
-        if type(payload) == PrepareRequest:
-            self.recv_prepare(packet)
-        elif type(payload) == AcceptRequest:
-            self.recv_accept(packet)
-        elif type(payload) == PrepareReply:
-            self.recv_prepare_reply(packet)
-        elif type(payload) == AcceptReply:
-            self.recv_accept_reply(packet)
-        elif type(payload) == DecidedRequest:
-            self.recv_decided_request(packet)
+        handler = self.handlers.get(type(payload))
+        if handler:
+            handler(packet)
 
     def dprint(self, s):
         if self.debug:
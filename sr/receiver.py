@@ -17,51 +17,71 @@ class SRReceiver(SingleDevice):
         # number range and window size of selective repeat
         self.seqno_width = seqno_width
         self.seqno_range = 2**self.seqno_width
+        # seqno_range is a power of two, so `x & seqno_mask` == `x % seqno_range`
+        self.seqno_mask = self.seqno_range - 1
         self.window_size = window_size
         assert self.window_size <= self.seqno_range // 2
         self.seqno_start = 0
-        self.message = ""
-        self.recv_window: List[Optional[Packet]] = [None] * self.window_size
+        # delivered payloads, joined on demand by the `message` property
+        self._chunks: List[str] = []
+        # receive window as a ring of buffered payloads, None for empty slots
+        self.recv_window: List[Optional[str]] = [None] * self.window_size
         self.recv_start = 0
         self.debug = debug
 
+    @property
+    def message(self) -> str:
+        return "".join(self._chunks)
+
     def new_packet(self, ackno: int) -> Packet:
         return Packet(time=self.env.now, size=40, packet_id=ackno)
 
+    def send_ack(self, ackno: int):
+        # ACKs are handed to the wire, which may hold several in flight, so
+        # a fresh packet is built for each one rather than reusing a template
+        ack_pkt = self.new_packet(ackno)
+        assert self.out
+        self.out.put(ack_pkt)
+        self.dprint(f"send ack {self.seqno_start}")
+
     def put(self, packet: Packet):          
         seqno = packet.packet_id
         data = packet.payload
-        lwnd_start = (
-            self.seqno_start + self.seqno_range - self.window_size
-        ) % self.seqno_range
+        lwnd_start = (self.seqno_start - self.window_size) & self.seqno_mask
         rwnd_start = self.seqno_start
         if self.is_valid_seqno(rwnd_start, self.window_size, self.seqno_range, seqno):
-            dist = (seqno + self.seqno_range - self.seqno_start) % self.seqno_range
-            self.recv_window[(self.recv_start + dist) % self.window_size] = packet
-            while self.recv_window[self.recv_start] is not None:
-                cached_pkt = self.recv_window[self.recv_start]
-                assert cached_pkt
-                self.message += cached_pkt.payload
-                self.recv_window[self.recv_start] = None
-                self.recv_start = (self.recv_start + 1) % self.window_size
-                self.seqno_start = (self.seqno_start + 1) % self.seqno_range
-            ack_pkt = self.new_packet(seqno)
-            assert self.out
-            self.out.put(ack_pkt)
-            self.dprint(f"send ack {self.seqno_start}")
+            dist = (seqno - self.seqno_start) & self.seqno_mask
+            rw = self.recv_window
+            chunks = self._chunks
+            ws = self.window_size
+            mask = self.seqno_mask
+            rs = self.recv_start
+            ss = self.seqno_start
+            # rs and dist are both below ws, so one subtract wraps the index
+            idx = rs + dist
+            if idx >= ws:
+                idx -= ws
+            rw[idx] = data
+            while rw[rs] is not None:
+                chunks.append(rw[rs])
+                rw[rs] = None
+                rs += 1
+                if rs == ws:
+                    rs = 0
+                ss = (ss + 1) & mask
+            self.recv_start = rs
+            self.seqno_start = ss
+            self.send_ack(seqno)
         elif self.is_valid_seqno(lwnd_start, self.window_size, self.seqno_range, seqno):
-            ack_pkt = self.new_packet(seqno)
-            assert self.out
-            self.out.put(ack_pkt)
-            self.dprint(f"send ack {self.seqno_start}")
+            self.send_ack(seqno)
         else:
             self.dprint(f"discard {data} on invalid seqno: {seqno}")
 
-    def is_valid_seqno(self, start: int, winsize: int, array_size: int, target: int):
+    @staticmethod
+    def is_valid_seqno(start: int, winsize: int, array_size: int, target: int):
         dist = (target + array_size - start) % array_size
         return 0 <= dist < winsize
 
-
     def dprint(self, s: str):
         if self.debug:
             print(f"[receiver](time: {self.env.now:.2f})", end=" -> ")
@@ -1,16 +1,9 @@
-from typing import Deque
-from dataclasses import dataclass
+import heapq
+from typing import Deque, List, Tuple
 from collections import deque
 from onl.packet import Packet
 from onl.device import SingleDevice
-from onl.sim import Environment, Store
-from onl.utils import Timer
-
-
-@dataclass
-class QueueItem:
-    packet: Packet
-    ack_received: bool = False
+from onl.sim import Environment, Store, ProcessGenerator
 
 
 class SRSender(SingleDevice):
@@ -28,12 +21,15 @@ class SRSender(SingleDevice):
         # number range and window size of selective repeat
         self.seqno_width = seqno_width
         self.seqno_range = 2**self.seqno_width
+        # seqno_range is a power of two, so `x & seqno_mask` == `x % seqno_range`
+        self.seqno_mask = self.seqno_range - 1
         self.window_size = window_size
         assert self.window_size <= self.seqno_range // 2
         # time interval for timeout resending
         self.timeout = timeout
         self.debug = debug
         self.message = message
+        self.msglen = len(message)
         # the sequence number of the next character to be sent
         self.seqno = 0
         # the absolute index of the next character to be sent
@@ -41,36 +37,61 @@ class SRSender(SingleDevice):
         # sequence number of first packet in outbound buffer
         self.seqno_start = 0
         # packet buffer to save the packets that havn't been acknowledged by receiver
-        self.outbound: Deque[QueueItem] = deque()
-        self.timers: Deque[Timer] = deque()
+        self.outbound: Deque[Packet] = deque()
+        # whether the packet at the same position in outbound has been acked
+        self.acked: Deque[bool] = deque()
+        # min-heap of (deadline, absno) for the retransmission timers of all
+        # outstanding packets; entries of acked packets are dropped lazily
+        self.deadlines: List[Tuple[float, int]] = []
+        # wakes up the timer process while it is idle waiting for a deadline
+        self.timer_channel: Store = Store(env)
+        self.timer_idle = False
         # use `self.finish_channel.put(True)` to termiate the sending process
         self.finish_channel: Store = Store(env)
 
         self.proc = env.process(self.run(env))
+        env.process(self.run_timers(env))
 
     def new_packet(self, seqno: int, data: str) -> Packet:
         return Packet(time=self.env.now, size=40, packet_id=seqno, payload=data)
 
     def send_available(self):
-        while len(self.outbound) > 0 and self.outbound[0].ack_received:
+        while len(self.outbound) > 0 and self.acked[0]:
             self.outbound.popleft()
-            timer = self.timers.popleft()
-            timer.stop()
-            self.seqno_start = (self.seqno_start + 1) % self.seqno_range
-        while len(self.outbound) < self.window_size and self.absno < len(self.message):
+            self.acked.popleft()
+            self.seqno_start = (self.seqno_start + 1) & self.seqno_mask
+        while len(self.outbound) < self.window_size and self.absno < self.msglen:
             packet = self.new_packet(self.seqno, self.message[self.absno])
             self.send_packet(packet)
-            self.seqno = (self.seqno + 1) % self.seqno_range
+            self.seqno = (self.seqno + 1) & self.seqno_mask
             self.absno += 1
-            self.outbound.append(QueueItem(packet))
-            timer = Timer(
-                self.env,
-                self.timeout,
-                self.timeout_callback,
-                auto_restart=True,
-                args=[packet],
-            )
-            self.timers.append(timer)
+            self.outbound.append(packet)
+            self.acked.append(False)
+            self.push_deadline(self.absno - 1)
+
+    def push_deadline(self, absno: int):
+        if self.timer_idle:
+            self.timer_idle = False
+            self.timer_channel.put(True)
+        heapq.heappush(self.deadlines, (self.env.now + self.timeout, absno))
+
+    def run_timers(self, env: Environment) -> ProcessGenerator:
+        """Single timer process: sleep until the nearest deadline and resend
+        the packet if it is still outstanding and unacknowledged."""
+        while True:
+            if not self.deadlines:
+                self.timer_idle = True
+                yield self.timer_channel.get()
+                continue
+            deadline, absno = self.deadlines[0]
+            if deadline > env.now:
+                yield env.timeout(deadline - env.now)
+                continue
+            heapq.heappop(self.deadlines)
+            idx = absno - (self.absno - len(self.outbound))
+            if 0 <= idx < len(self.outbound) and not self.acked[idx]:
+                self.timeout_callback(self.outbound[idx])
+                self.push_deadline(absno)
 
     def timeout_callback(self, packet: Packet):
         self.dprint("timeout")
@@ -90,13 +111,13 @@ class SRSender(SingleDevice):
     def put(self, packet: Packet):
         """Receiving acknowledgement packet from receiver"""
         ackno = packet.packet_id
-        dist = (ackno + self.seqno_range - self.seqno_start) % self.seqno_range
+        dist = (ackno - self.seqno_start) & self.seqno_mask
         if dist >= self.window_size:
             self.dprint(f"outdated ack {ackno}")
         else:
-            self.outbound[dist].ack_received = True
+            self.acked[dist] = True
             self.send_available()
-        if len(self.outbound) == 0 and self.absno == len(self.message):
+        if len(self.outbound) == 0 and self.absno == self.msglen:
             self.finish_channel.put(True)
 
     def dprint(self, s):